@@ -1,15 +1,18 @@
 import streamlit as st
 # FIXED: Database functions are now imported from the new location (views.database)
-from views.database import init_db, get_user
+from views.database import init_db, get_user, current_site
+from views.reports import start_scheduler
 # Import the new admin tools page
-from views import tracker, planner, dashboard, admin_tools 
-
-# Initialize Database
-init_db()
+from views import tracker, planner, dashboard, admin_tools, search
 
 # Page Configuration
 st.set_page_config(page_title="TILP Connect", layout="wide", page_icon="🧩")
 
+# Initialize Database (runs migrations once per server process)
+init_db()
+# Month-end reports are built by a background thread
+start_scheduler()
+
 # --- DATABASE AUTHENTICATION ---
 def login_screen():
     st.title("🔐 TILP Connect Login")
@@ -28,6 +31,8 @@ def login_screen():
                 st.session_state["username"] = user_data["username"]
                 # Store the child link for parent filtering
                 st.session_state["child_link"] = user_data["child_link"]
+                # All data is scoped to the user's site (clinic)
+                st.session_state["site_id"] = user_data["site_id"]
                 st.rerun()
             else:
                 st.error("Incorrect username or password")
@@ -46,6 +51,7 @@ def main():
     username = st.session_state["username"]
     st.sidebar.title(f"👤 User: {username.capitalize()}")
     st.sidebar.markdown(f"**Role:** {user_role.upper()}")
+    st.sidebar.markdown(f"**Site:** {current_site()}")
     
     # Define available pages based on Role
     pages = {}
@@ -58,6 +64,7 @@ def main():
     if user_role in ["admin", "OT", "SLP", "BC", "ECE", "Assistant", "staff"]:
         pages["📝 Progress Tracker"] = tracker.show_page
         pages["📅 Daily Planner"] = planner.show_page
+        pages["🔍 Search Notes"] = search.show_page
     
     # Dashboard view changes based on role
     if user_role == "parent":
@@ -0,0 +1,76 @@
+# tests/test_migrations.py - schema migrations against a local SQLite database
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from views import migrations
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'tilp.db'}")
+
+
+def test_empty_database(engine):
+    applied = migrations.run_migrations(engine)
+
+    assert applied == [version for version, _, _ in migrations.MIGRATIONS]
+    assert migrations.verify_indexes(engine) == []
+    # Nothing left to do on the next start
+    assert migrations.run_migrations(engine) == []
+
+
+def test_existing_hand_made_tables(engine):
+    # Tables as they were created by hand before migrations existed
+    with engine.begin() as c:
+        c.execute(text("CREATE TABLE users (username TEXT PRIMARY KEY, password TEXT, role TEXT, child_link TEXT)"))
+        c.execute(text("CREATE TABLE children (child_name TEXT PRIMARY KEY, parent_username TEXT, date_of_birth DATE)"))
+        c.execute(text("CREATE TABLE disciplines (name TEXT PRIMARY KEY)"))
+        c.execute(text("CREATE TABLE progress (id INTEGER PRIMARY KEY AUTOINCREMENT, date DATE, child_name TEXT, "
+                       "discipline TEXT, goal_area TEXT, status TEXT, notes TEXT, media_path TEXT)"))
+        c.execute(text("INSERT INTO users VALUES ('admin', 'pw', 'admin', 'All')"))
+        c.execute(text("INSERT INTO children VALUES ('Tony', 'None', '2020-01-01')"))
+        c.execute(text("INSERT INTO disciplines VALUES ('OT')"))
+        c.execute(text("INSERT INTO progress (date, child_name, discipline, goal_area, status, notes) "
+                       "VALUES ('2024-01-02', 'Tony', 'OT', 'Feeding', 'Stable', 'spoon')"))
+
+    migrations.run_migrations(engine)
+
+    assert migrations.verify_indexes(engine) == []
+    with engine.begin() as c:
+        assert c.execute(text("SELECT child_name, site_id FROM children")).all() == [("Tony", migrations.DEFAULT_SITE)]
+        assert c.execute(text("SELECT site_id FROM progress")).scalar() == migrations.DEFAULT_SITE
+        assert c.execute(text("SELECT name FROM disciplines")).scalar() == "OT"
+        # Child names only have to be unique within a site now
+        c.execute(text("INSERT INTO children (child_name, site_id) VALUES ('Tony', 'north')"))
+    assert inspect(engine).get_pk_constraint("children")["constrained_columns"] == ["site_id", "child_name"]
+
+
+def test_failed_migration_rolls_back(engine, monkeypatch):
+    migrations.run_migrations(engine)
+
+    def broken(c, dialect):
+        c.execute(text("CREATE TABLE half_done (id INTEGER)"))
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS + [(99, "broken", broken)])
+    with pytest.raises(RuntimeError):
+        migrations.run_migrations(engine)
+
+    # DDL is part of the transaction on SQLite too, so nothing is left behind
+    assert not inspect(engine).has_table("half_done")
+    assert 99 not in migrations.applied_versions(engine)
+
+
+def test_failed_table_rebuild_can_be_retried(engine, monkeypatch):
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS[:4])
+    migrations.run_migrations(engine)
+    with engine.begin() as c:
+        c.execute(text("INSERT INTO children (child_name) VALUES ('Tony')"))
+        # State left by a rebuild that stopped right after renaming the table
+        c.execute(text("ALTER TABLE children RENAME TO children_old"))
+    monkeypatch.undo()
+
+    migrations.run_migrations(engine)
+
+    assert not inspect(engine).has_table("children_old")
+    with engine.connect() as c:
+        assert c.execute(text("SELECT child_name FROM children")).scalars().all() == ["Tony"]
@@ -1,7 +1,8 @@
 # views/admin_tools.py (NEW FILE - Fixed Import)
 import streamlit as st
 # FIXED: Using relative import (dot) since database.py is in the same folder
-from .database import get_list_data, upsert_user, delete_user, upsert_child, delete_child, upsert_list_item, delete_list_item 
+from .database import get_list_data, upsert_user, delete_user, upsert_child, delete_child, upsert_list_item, delete_list_item, get_sites, upsert_site, current_site, get_user_sites, switch_site, grant_site_access
+from .importer import show_import_tools
 import pandas as pd
 from datetime import date
 
@@ -10,7 +11,39 @@ def show_page():
     st.title("🔑 Admin Management Tools")
     st.info("Manage User Accounts, Child Profiles, and Custom List Options.")
 
-    tab1, tab2, tab3 = st.tabs(["👤 User Accounts", "👨‍👩‍👧‍👦 Child Profiles", "📝 Custom Lists"])
+    # --- SITE SELECTION ---
+    # Everything below (users, children, lists, imports) is managed per site.
+    # Admins only see their own site plus sites they were granted in user_sites.
+    df_sites = get_sites()
+    site_names = dict(zip(df_sites["site_id"], df_sites["site_name"]))
+    site_ids = get_user_sites(st.session_state["username"]) or [current_site()]
+    col_site, col_new = st.columns([2, 1])
+    site_id = col_site.selectbox("Managing Site", site_ids,
+                                 index=site_ids.index(current_site()) if current_site() in site_ids else 0,
+                                 format_func=lambda s: f"{site_names.get(s, s)} ({s})",
+                                 disabled=len(site_ids) < 2)
+    if site_id != current_site() and switch_site(site_id):
+        st.rerun()
+
+    with col_new.expander("➕ Add / Rename Site"):
+        new_site_id = st.text_input("Site ID", help="Short unique code, e.g. 'north'")
+        new_site_name = st.text_input("Site Name")
+        if st.button("💾 Save Site"):
+            if new_site_id and new_site_name:
+                if upsert_site(new_site_id, new_site_name):
+                    st.success(f"Site '{new_site_name}' saved.")
+                    st.rerun()
+            else:
+                st.error("Site ID and name are required.")
+
+    with col_new.expander("🔐 Grant Access to This Site"):
+        grant_username = st.text_input("Username", key="grant_username",
+                                       help="Lets this user (e.g. a regional admin) switch to this site")
+        if st.button("✅ Grant Access"):
+            if grant_username and grant_site_access(grant_username):
+                st.success(f"'{grant_username}' can now switch to site '{current_site()}'.")
+
+    tab1, tab2, tab3, tab4 = st.tabs(["👤 User Accounts", "👨‍👩‍👧‍👦 Child Profiles", "📝 Custom Lists", "📥 Bulk Import"])
 
     # --- TAB 1: USER ACCOUNTS (Request 2) ---
     with tab1:
@@ -61,14 +94,14 @@ def show_page():
                     final_password = password if password else current_password
                     final_child_link = child_link if role == "parent" and child_link != "None" else "All"
                     
-                    upsert_user(username, final_password, role, final_child_link)
-                    
-                    # Update child's parent_username in children table if linked
-                    if final_child_link != "All":
-                        upsert_child(final_child_link, username)
+                    # upsert_user shows the error itself (e.g. username taken by another site)
+                    if upsert_user(username, final_password, role, final_child_link):
+                        # Update child's parent_username in children table if linked
+                        if final_child_link != "All":
+                            upsert_child(final_child_link, username)
 
-                    st.success(f"User '{username}' ({role}) saved successfully.")
-                    st.rerun()
+                        st.success(f"User '{username}' ({role}) saved successfully.")
+                        st.rerun()
                 else:
                     st.error("Username is required.")
             
@@ -125,11 +158,12 @@ def show_page():
                     # 2. Update the newly assigned parent's user record (if one was selected)
                     if final_parent != "None":
                         # We don't change the password here, just the link
-                        upsert_user(final_parent, None, "parent", child_name) 
-                        st.success(f"Child '{child_name}' saved and linked to parent '{final_parent}'.")
+                        if upsert_user(final_parent, None, "parent", child_name):
+                            st.success(f"Child '{child_name}' saved and linked to parent '{final_parent}'.")
+                            st.rerun()
                     else:
                          st.success(f"Child '{child_name}' saved (no parent assigned).")
-                    st.rerun()
+                         st.rerun()
                 else:
                     st.error("Child Name is required.")
                     
@@ -185,4 +219,8 @@ def show_page():
                 if g_name:
                     delete_list_item("goal_areas", g_name)
                     st.warning(f"Goal Area '{g_name}' deleted.")
-                    st.rerun()
\ No newline at end of file
+                    st.rerun()
+
+    # --- TAB 4: BULK IMPORT ---
+    with tab4:
+        show_import_tools()
\ No newline at end of file
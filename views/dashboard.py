@@ -1,97 +1,105 @@
-# database.py (COMPLETELY REWRITTEN FOR SUPABASE)
+# views/dashboard.py (REWRITTEN - Progress dashboard with media evidence)
 import streamlit as st
 import pandas as pd
-# Import the connection manager for Supabase
-from streamlit_supabase_connection import SupabaseConnection
-
-# Initialize the Supabase Connection (it will look for credentials in .streamlit/secrets.toml)
-@st.cache_resource
-def get_supabase_connection():
-    # Use the connection component name you want (e.g., 'supabase_db')
-    return st.experimental_connection("supabase_db", type=SupabaseConnection)
-
-# Global connection object
-conn = get_supabase_connection()
-
-# --- Core Database Functions ---
-
-def init_db():
-    # Supabase is persistent, so we don't need to create tables.
-    # This function remains for consistency but does nothing.
-    st.info("Database initialization skipped. Using persistent Supabase tables.")
-    pass
-
-@st.cache_data(ttl=60) # Cache the data for 60 seconds to reduce Supabase reads
-def get_data(table_name):
-    """Fetches all data from the specified table."""
-    try:
-        # Use st.connection's read method
-        df = conn.read(table_name)
-        return df
-    except Exception as e:
-        st.error(f"Error fetching data from {table_name}: {e}")
-        return pd.DataFrame()
-
-# This function is used to populate the filters (Children, Disciplines)
-@st.cache_data
-def get_list_data(list_type):
-    """Fetches list-like data (e.g., child names, disciplines)."""
-    if list_type == "disciplines":
-        # In this simple example, we are hardcoding the list since you don't have a separate list table.
-        # If you were to create a 'disciplines' table in Supabase, you would use conn.read('disciplines').
-        data = {
-            "name": ["OT", "SLP", "BC", "ECE", "Assistant/BI"]
-        }
-    elif list_type == "children":
-        # Fetch unique child names from the progress table
-        df_progress = get_data("progress")
-        if not df_progress.empty:
-            data = {"name": df_progress["child_name"].unique().tolist()}
-        else:
-            data = {"name": []}
-    
-    # Return as a DataFrame for consistency with previous list functions
-    return pd.DataFrame(data)
-
-
-def save_progress(date, child, discipline, goal, status, notes):
-    """Saves a new progress entry."""
-    data = [{
-        "date": date.isoformat(), 
-        "child_name": child, 
-        "discipline": discipline, 
-        "goal_area": goal, 
-        "status": status, 
-        "notes": notes,
-        # Note: 'media_path' is not included here as your current tracker.py doesn't handle file uploads
-    }]
-    try:
-        conn.insert(table="progress", data=data)
-        st.cache_data.clear() # Clear cache so the dashboard updates
-        return True
-    except Exception as e:
-        st.error(f"Error saving progress data: {e}")
-        return False
-
-
-def save_plan(date, lead_staff, support_staff, warm_up, learning_block, regulation_break, social_play, closing_routine, materials_needed, internal_notes):
-    """Saves a new daily session plan entry."""
-    data = [{
-        "date": date, 
-        "lead_staff": lead_staff, 
-        "support_staff": support_staff, 
-        "warm_up": warm_up, 
-        "learning_block": learning_block, 
-        "regulation_break": regulation_break, 
-        "social_play": social_play,
-        "closing_routine": closing_routine,
-        "materials_needed": materials_needed,
-        "internal_notes": internal_notes
-    }]
-    try:
-        conn.insert(table="session_plans", data=data)
-        st.cache_data.clear() # Clear cache so the planner view updates
-        return True
-    except Exception as e:
-        st.error(f"Error saving plan data: {e}")
-        return False
\ No newline at end of file
+import plotly.express as px
+from .database import load_frame, memory_report
+from .media import get_thumbnail, media_file, is_video
+from .reports import show_reports
+
+MEDIA_PER_PAGE = 12
+
+def show_page():
+    user_role = st.session_state.get("user_role")
+
+    if user_role == "parent":
+        child_link = st.session_state.get("child_link", "All")
+        st.header(f"📊 {child_link}'s Progress Dashboard")
+    else:
+        st.header("📊 Dashboard & Reports")
+
+    df = load_frame("progress")
+    if df.empty:
+        st.warning("No progress entries saved yet.")
+        return
+
+    if user_role != "parent":
+        with st.expander("🧮 Data Memory Usage"):
+            report = memory_report(df)
+            st.caption(f"{len(df)} progress entries using {report['bytes'].sum() / 1024:.1f} KB")
+            st.dataframe(report, use_container_width=True)
+
+    # --- Filters ---
+    col1, col2 = st.columns(2)
+    if user_role == "parent":
+        # Parents only ever see their own child
+        child = child_link
+        df = df[df["child_name"] == child]
+    else:
+        child = col1.selectbox("Child", ["All"] + sorted(df["child_name"].dropna().unique().tolist()))
+        if child != "All":
+            df = df[df["child_name"] == child]
+
+    discipline = col2.selectbox("Discipline", ["All"] + sorted(df["discipline"].dropna().unique().tolist()))
+    if discipline != "All":
+        df = df[df["discipline"] == discipline]
+
+    if df.empty:
+        st.warning("No progress entries match these filters.")
+        return
+
+    # --- Charts ---
+    status_colors = {"Regression": "#e45756", "Stable": "#f2cf5b", "Progress": "#54a24b"}
+    fig = px.histogram(df, x="date", color="status", color_discrete_map=status_colors,
+                       title="Performance Status Over Time")
+    st.plotly_chart(fig, use_container_width=True)
+
+    fig_goals = px.histogram(df, x="goal_area", color="status", color_discrete_map=status_colors,
+                             barmode="group", title="Status by Goal Area")
+    st.plotly_chart(fig_goals, use_container_width=True)
+
+    st.subheader("📋 Progress Entries")
+    st.dataframe(df.sort_values(by="date", ascending=False).drop(columns=["media_path"], errors="ignore"),
+                 use_container_width=True)
+
+    show_media(df)
+
+    # --- Monthly Reports (built in the background, served from cache) ---
+    st.divider()
+    if child != "All":
+        show_reports("child", child)
+    elif discipline != "All":
+        show_reports("discipline", discipline)
+    else:
+        st.caption("📄 Select a child or discipline to view monthly reports.")
+
+def show_media(df):
+    """Shows photo and video evidence as cached thumbnails. Full files are only loaded on request."""
+    if "media_path" not in df.columns:
+        return
+    df_media = df[df["media_path"].notna() & (df["media_path"] != "")].sort_values(by="date", ascending=False)
+    if df_media.empty:
+        return
+
+    st.subheader("📷 Media Evidence")
+    pages = max(1, -(-len(df_media) // MEDIA_PER_PAGE))
+    page = st.number_input("Page", min_value=1, max_value=pages, value=1) if pages > 1 else 1
+    df_page = df_media.iloc[(page - 1) * MEDIA_PER_PAGE:page * MEDIA_PER_PAGE]
+
+    cols = st.columns(4)
+    for i, (row_id, row) in enumerate(df_page.iterrows()):
+        with cols[i % 4]:
+            caption = f"{row['child_name']} · {row['goal_area']} · {row['date'].date().isoformat()}"
+            thumb = get_thumbnail(row["media_path"])
+            if thumb is not None:
+                st.image(str(thumb), caption=caption, use_container_width=True)
+            else:
+                st.caption(f"🎬 {caption}" if is_video(row["media_path"]) else f"📎 {caption}")
+
+            full_file = media_file(row["media_path"])
+            if full_file is None:
+                st.caption("File missing")
+            elif st.toggle("View full size", key=f"media_{row_id}"):
+                if is_video(row["media_path"]):
+                    st.video(str(full_file))
+                else:
+                    st.image(str(full_file), use_container_width=True)
@@ -1,15 +1,47 @@
 # views/database.py (SUPABASE VERSION)
 import streamlit as st
 import pandas as pd
+import hashlib
+import io
+import math
+import re
+import threading
+from collections import defaultdict
 from datetime import datetime
 from sqlalchemy import text
+from .migrations import run_migrations, verify_indexes, SEARCH_FIELDS, tsvector_expr, DEFAULT_SITE
 
 # Initialize connection using the secrets.toml configuration
 conn = st.connection("supabase_db", type="sql")
 
+@st.cache_resource
+def _migrate():
+    # Only cached when it succeeds; if it raises, the next script run tries again
+    run_migrations(conn.engine)
+    return verify_indexes(conn.engine)
+
 def init_db():
-    # Tables are already created in Supabase via SQL Editor
-    pass
+    """Brings the schema up to date and checks the required indexes. Migrations run once per server process."""
+    # Existing Supabase tables (created via SQL Editor) are kept; migrations only add what is missing
+    try:
+        missing = _migrate()
+        if missing:
+            st.warning(f"Missing database indexes, queries will be slow: {', '.join(missing)}")
+    except Exception as e:
+        st.error(f"Database Migration Error: {e}")
+
+def is_postgres():
+    return conn.engine.dialect.name == "postgresql"
+
+def current_site():
+    """Site of the logged-in user. Every query and cache below is scoped to it."""
+    return st.session_state.get("site_id", DEFAULT_SITE)
+
+def _invalidate(table_name):
+    # Drop cached frames and move the table's search index to a new version after a write
+    with _search_versions_lock:
+        _search_versions[table_name] += 1
+    _load_frame.clear()
 
 # --- CORE DB FUNCTIONS ---
 
@@ -25,42 +57,177 @@ def get_user(username, password):
         st.error(f"Database Error: {e}")
         return None
 
-def get_data(table_name):
-    """Retrieves all data from a table."""
+def get_data(table_name, site_id=None):
+    """Retrieves all of the current site's data from a table."""
     try:
         # ttl=0 ensures we always get fresh data
-        return conn.query(f"SELECT * FROM {table_name}", ttl=0)
+        return conn.query(f"SELECT * FROM {table_name} WHERE site_id = :site",
+                          params={"site": site_id or current_site()}, ttl=0)
     except Exception:
         return pd.DataFrame()
 
 def get_list_data(table_name):
     return get_data(table_name)
 
+def get_data_between(table_name, start, end):
+    """Retrieves the current site's rows dated between start and end (inclusive).
+    Errors are raised, since callers use this to decide what not to insert."""
+    return conn.query(f"SELECT * FROM {table_name} WHERE site_id = :site AND date >= :start AND date <= :end",
+                      params={"site": current_site(), "start": start, "end": end}, ttl=0)
+
+# --- Site Functions ---
+
+def get_sites():
+    try:
+        return conn.query("SELECT * FROM sites ORDER BY site_name", ttl=0)
+    except Exception:
+        return pd.DataFrame(columns=["site_id", "site_name"])
+
+def get_user_sites(username):
+    """Sites a user may work in: their own site plus any granted in user_sites."""
+    try:
+        df = conn.query("SELECT site_id FROM users WHERE username = :u "
+                        "UNION SELECT site_id FROM user_sites WHERE username = :u",
+                        params={"u": username}, ttl=0)
+        return df["site_id"].tolist()
+    except Exception:
+        return []
+
+def switch_site(site_id):
+    """Makes site_id the current site, only if the logged-in user has access to it."""
+    if site_id not in get_user_sites(st.session_state.get("username")):
+        st.error("You don't have access to that site.")
+        return False
+    st.session_state["site_id"] = site_id
+    return True
+
+def upsert_site(site_id, site_name):
+    """Creates a site (the creator gets access to it) or renames one the user has access to."""
+    username = st.session_state.get("username")
+    try:
+        with conn.session as s:
+            exists = s.execute(text("SELECT 1 FROM sites WHERE site_id = :s"), {"s": site_id}).first()
+            if exists and site_id not in get_user_sites(username):
+                st.error(f"Site '{site_id}' already exists and you don't have access to it.")
+                return False
+            s.execute(
+                text("INSERT INTO sites (site_id, site_name) VALUES (:s, :n) "
+                     "ON CONFLICT (site_id) DO UPDATE SET site_name = :n"),
+                {"s": site_id, "n": site_name}
+            )
+            s.execute(
+                text("INSERT INTO user_sites (username, site_id) VALUES (:u, :s) ON CONFLICT (username, site_id) DO NOTHING"),
+                {"u": username, "s": site_id}
+            )
+            s.commit()
+        return True
+    except Exception as e:
+        st.error(f"Error saving site: {e}")
+        return False
+
+def grant_site_access(username):
+    """Lets an existing user switch to the current site."""
+    try:
+        with conn.session as s:
+            if s.execute(text("SELECT 1 FROM users WHERE username = :u"), {"u": username}).first() is None:
+                st.error(f"User '{username}' does not exist.")
+                return False
+            s.execute(
+                text("INSERT INTO user_sites (username, site_id) VALUES (:u, :s) ON CONFLICT (username, site_id) DO NOTHING"),
+                {"u": username, "s": current_site()}
+            )
+            s.commit()
+        return True
+    except Exception as e:
+        st.error(f"Error granting site access: {e}")
+        return False
+
+# --- Typed DataFrames ---
+
+# Performance status as an ordered category: stored as int8 codes, sorts Regression < Stable < Progress
+STATUS_LEVELS = ["Regression", "Stable", "Progress"]
+STATUS_DTYPE = pd.CategoricalDtype(STATUS_LEVELS, ordered=True)
+
+# Column types applied once at load time, so pages don't re-parse on every rerun
+TABLE_SCHEMAS = {
+    "progress": {"category": ["child_name", "discipline", "goal_area"], "status": ["status"], "date": ["date"]},
+    "session_plans": {"category": ["lead_staff", "support_staff"], "date": ["date"]},
+    "children": {"category": ["parent_username"], "date": ["date_of_birth"]},
+}
+
+def apply_schema(df, table_name):
+    """Converts low-cardinality text to categoricals, status to STATUS_DTYPE and dates to datetime64."""
+    schema = TABLE_SCHEMAS.get(table_name, {})
+    for col in schema.get("category", []):
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    for col in schema.get("status", []):
+        if col in df.columns:
+            df[col] = df[col].astype(STATUS_DTYPE)
+    for col in schema.get("date", []):
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    return df
+
+def load_frame(table_name):
+    """Retrieves the current site's rows with compact, typed columns. Cached until the next write."""
+    return _load_frame(table_name, current_site())
+
+@st.cache_data(ttl=600)
+def _load_frame(table_name, site_id):
+    # site_id is part of the cache key, so sites never see each other's cached frames.
+    # Every row shares it, so drop the column instead of caching one string per row.
+    df = get_data(table_name, site_id).drop(columns=["site_id"], errors="ignore")
+    return apply_schema(df, table_name)
+
+def memory_report(df):
+    """Deep memory usage per column, in bytes."""
+    usage = df.memory_usage(deep=True, index=False)
+    return pd.DataFrame({"column": usage.index, "dtype": df.dtypes.astype(str).values, "bytes": usage.values})
+
 # --- CRUD Functions ---
 
 def upsert_user(username, password, role, child_link):
+    """Saves a user at the current site. Returns True if a row was written."""
     try:
         with conn.session as s:
+            # Usernames are global logins, so never overwrite another site's user
             if password:
-                s.execute(
-                    text("INSERT INTO users (username, password, role, child_link) VALUES (:u, :p, :r, :c) "
-                         "ON CONFLICT (username) DO UPDATE SET password = :p, role = :r, child_link = :c"),
-                    {"u": username, "p": password, "r": role, "c": child_link}
+                result = s.execute(
+                    text("INSERT INTO users (username, password, role, child_link, site_id) VALUES (:u, :p, :r, :c, :site) "
+                         "ON CONFLICT (username) DO UPDATE SET password = :p, role = :r, child_link = :c "
+                         "WHERE users.site_id = :site"),
+                    {"u": username, "p": password, "r": role, "c": child_link, "site": current_site()}
                 )
             else:
                 # Update without changing password
-                s.execute(
-                    text("UPDATE users SET role = :r, child_link = :c WHERE username = :u"),
-                    {"u": username, "r": role, "c": child_link}
+                result = s.execute(
+                    text("UPDATE users SET role = :r, child_link = :c WHERE username = :u AND site_id = :site"),
+                    {"u": username, "r": role, "c": child_link, "site": current_site()}
                 )
+            if result.rowcount == 0:
+                # Nothing was written: either another site owns the username, or a new user has no password
+                owner = s.execute(text("SELECT site_id FROM users WHERE username = :u"), {"u": username}).first()
+                s.rollback()
+                if owner is not None:
+                    st.error(f"Username '{username}' is already taken by another site.")
+                else:
+                    st.error(f"User '{username}' does not exist yet; a password is required for new users.")
+                return False
             s.commit()
+        return True
     except Exception as e:
         st.error(f"Error saving user: {e}")
+        return False
 
 def delete_user(username):
     try:
         with conn.session as s:
-            s.execute(text("DELETE FROM users WHERE username = :u"), {"u": username})
+            result = s.execute(text("DELETE FROM users WHERE username = :u AND site_id = :site"),
+                               {"u": username, "site": current_site()})
+            # Don't let a later account with the same name inherit this user's site access
+            if result.rowcount:
+                s.execute(text("DELETE FROM user_sites WHERE username = :u"), {"u": username})
             s.commit()
     except Exception as e:
         st.error(f"Error deleting user: {e}")
@@ -69,11 +236,12 @@ def upsert_child(child_name, parent_username, date_of_birth=None):
     try:
         with conn.session as s:
             s.execute(
-                text("INSERT INTO children (child_name, parent_username, date_of_birth) VALUES (:c, :p, :d) "
-                     "ON CONFLICT (child_name) DO UPDATE SET parent_username = :p, date_of_birth = :d"),
-                {"c": child_name, "p": parent_username, "d": date_of_birth}
+                text("INSERT INTO children (child_name, parent_username, date_of_birth, site_id) VALUES (:c, :p, :d, :site) "
+                     "ON CONFLICT (site_id, child_name) DO UPDATE SET parent_username = :p, date_of_birth = :d"),
+                {"c": child_name, "p": parent_username, "d": date_of_birth, "site": current_site()}
             )
             s.commit()
+        _invalidate("children")
     except Exception as e:
         st.error(f"Error saving child: {e}")
 
@@ -81,10 +249,13 @@ def delete_child(child_name):
     try:
         with conn.session as s:
             # Clear parent link first
-            s.execute(text("UPDATE users SET child_link = 'All' WHERE child_link = :c"), {"c": child_name})
+            s.execute(text("UPDATE users SET child_link = 'All' WHERE child_link = :c AND site_id = :site"),
+                      {"c": child_name, "site": current_site()})
             # Delete child
-            s.execute(text("DELETE FROM children WHERE child_name = :c"), {"c": child_name})
+            s.execute(text("DELETE FROM children WHERE child_name = :c AND site_id = :site"),
+                      {"c": child_name, "site": current_site()})
             s.commit()
+        _invalidate("children")
     except Exception as e:
         st.error(f"Error deleting child: {e}")
 
@@ -96,8 +267,8 @@ def upsert_list_item(table_name, item_name):
         
         with conn.session as s:
             s.execute(
-                text(f"INSERT INTO {table_name} (name) VALUES (:n) ON CONFLICT (name) DO NOTHING"),
-                {"n": item_name}
+                text(f"INSERT INTO {table_name} (name, site_id) VALUES (:n, :site) ON CONFLICT (site_id, name) DO NOTHING"),
+                {"n": item_name, "site": current_site()}
             )
             s.commit()
     except Exception as e:
@@ -109,7 +280,8 @@ def delete_list_item(table_name, item_name):
         if table_name not in valid_tables: return
         
         with conn.session as s:
-            s.execute(text(f"DELETE FROM {table_name} WHERE name = :n"), {"n": item_name})
+            s.execute(text(f"DELETE FROM {table_name} WHERE name = :n AND site_id = :site"),
+                      {"n": item_name, "site": current_site()})
             s.commit()
     except Exception as e:
         st.error(f"Error deleting item: {e}")
@@ -120,24 +292,231 @@ def save_progress(date, child, discipline, goal, status, notes, media_path):
     try:
         with conn.session as s:
             s.execute(
-                text("INSERT INTO progress (date, child_name, discipline, goal_area, status, notes, media_path) "
-                     "VALUES (:d, :c, :di, :g, :s, :n, :m)"),
-                {"d": date, "c": child, "di": discipline, "g": goal, "s": status, "n": notes, "m": media_path}
+                text("INSERT INTO progress (date, child_name, discipline, goal_area, status, notes, media_path, site_id) "
+                     "VALUES (:d, :c, :di, :g, :s, :n, :m, :site)"),
+                {"d": date, "c": child, "di": discipline, "g": goal, "s": status, "n": notes, "m": media_path,
+                 "site": current_site()}
             )
             s.commit()
+        _invalidate("progress")
+        return True
     except Exception as e:
         st.error(f"Error saving progress: {e}")
+        return False
 
 def save_plan(date, lead_staff, support_staff, warm_up, learning_block, regulation_break, social_play, closing_routine, materials_needed, internal_notes):
     try:
         with conn.session as s:
             s.execute(
                 text("INSERT INTO session_plans (date, lead_staff, support_staff, warm_up, learning_block, regulation_break, "
-                     "social_play, closing_routine, materials_needed, internal_notes) "
-                     "VALUES (:d, :ls, :ss, :w, :l, :r, :sp, :cr, :m, :i)"),
+                     "social_play, closing_routine, materials_needed, internal_notes, site_id) "
+                     "VALUES (:d, :ls, :ss, :w, :l, :r, :sp, :cr, :m, :i, :site)"),
                 {"d": date, "ls": lead_staff, "ss": support_staff, "w": warm_up, "l": learning_block, 
-                 "r": regulation_break, "sp": social_play, "cr": closing_routine, "m": materials_needed, "i": internal_notes}
+                 "r": regulation_break, "sp": social_play, "cr": closing_routine, "m": materials_needed, "i": internal_notes,
+                 "site": current_site()}
             )
             s.commit()
+        _invalidate("session_plans")
     except Exception as e:
-        st.error(f"Error saving plan: {e}")
\ No newline at end of file
+        st.error(f"Error saving plan: {e}")
+
+# --- Search Functions ---
+
+# Write counter per table. In-process search indexes (used when the database is not Postgres)
+# are cached per (table, site, version), so an index built from data read before a write
+# is stored under the old version and never served afterwards.
+_search_versions = defaultdict(int)
+_search_versions_lock = threading.Lock()
+
+def search_records(table_name, query, child=None, discipline=None, start_date=None, end_date=None,
+                   page=1, page_size=25):
+    """Ranked full-text search over progress notes or session plans.
+    Returns (page of results, total number of matches)."""
+    if table_name not in SEARCH_FIELDS or not query.strip():
+        return pd.DataFrame(), 0
+    # Child and discipline only exist on progress entries
+    if table_name != "progress":
+        child, discipline = None, None
+    try:
+        if is_postgres():
+            return _search_postgres(table_name, query, child, discipline, start_date, end_date, page, page_size)
+        return _search_local(table_name, query, child, discipline, start_date, end_date, page, page_size)
+    except Exception as e:
+        st.error(f"Search Error: {e}")
+        return pd.DataFrame(), 0
+
+def _search_postgres(table_name, query, child, discipline, start_date, end_date, page, page_size):
+    expr = tsvector_expr(table_name)
+    document = " || ' ' || ".join(f"coalesce(t.{f}, '')" for f in SEARCH_FIELDS[table_name])
+    filters = [f"{expr} @@ q", "t.site_id = :site"]
+    params = {"q": query, "site": current_site(), "limit": page_size, "offset": (page - 1) * page_size}
+    if child:
+        filters.append("t.child_name = :c")
+        params["c"] = child
+    if discipline:
+        filters.append("t.discipline = :di")
+        params["di"] = discipline
+    if start_date:
+        filters.append("t.date >= :start")
+        params["start"] = start_date.isoformat()
+    if end_date:
+        filters.append("t.date <= :end")
+        params["end"] = end_date.isoformat()
+
+    sql = (f"SELECT t.*, ts_rank({expr}, q) AS rank, "
+           f"ts_headline('english', {document}, q) AS snippet, COUNT(*) OVER() AS total "
+           f"FROM {table_name} t, websearch_to_tsquery('english', :q) q "
+           f"WHERE {' AND '.join(filters)} "
+           f"ORDER BY rank DESC, t.date DESC LIMIT :limit OFFSET :offset")
+    df = conn.query(sql, params=params, ttl=0)
+    if df.empty:
+        return df, 0
+    total = int(df["total"].iloc[0])
+    return df.drop(columns=["total"]), total
+
+def _tokenize(value):
+    return re.findall(r"[a-z0-9]+", str(value).lower())
+
+@st.cache_resource(ttl=3600, max_entries=50, show_spinner=False)
+def _build_search_index(table_name, site_id, version):
+    df = get_data(table_name, site_id).reset_index(drop=True)
+    postings = defaultdict(dict)  # token -> {row position: term frequency}
+    fields = [f for f in SEARCH_FIELDS[table_name] if f in df.columns]
+    if fields:
+        # Join only the non-empty fields, so snippets don't start with blank padding
+        documents = df[fields].fillna("").astype(str).agg(
+            lambda row: " ".join(v.strip() for v in row if v.strip()), axis=1)
+    else:
+        documents = pd.Series("", index=df.index)
+    for row, document in documents.items():
+        for token in _tokenize(document):
+            postings[token][row] = postings[token].get(row, 0) + 1
+    if "date" in df.columns:
+        df["date"] = pd.to_datetime(df["date"]).dt.date
+    return {"frame": df, "documents": documents, "postings": postings}
+
+def _search_local(table_name, query, child, discipline, start_date, end_date, page, page_size):
+    index = _build_search_index(table_name, current_site(), _search_versions[table_name])
+    df, postings = index["frame"], index["postings"]
+
+    terms = set(_tokenize(query))
+    if not terms or any(term not in postings for term in terms):
+        return pd.DataFrame(), 0
+
+    # Every term must match (same as websearch_to_tsquery); rank by tf-idf
+    rows = set.intersection(*(set(postings[term]) for term in terms))
+    scores = defaultdict(float)
+    for term in terms:
+        idf = math.log(1 + len(df) / len(postings[term]))
+        for row in rows:
+            scores[row] += postings[term][row] * idf
+
+    results = df.loc[sorted(rows)].copy()
+    results["rank"] = results.index.map(scores)
+    if child:
+        results = results[results["child_name"] == child]
+    if discipline:
+        results = results[results["discipline"] == discipline]
+    if start_date:
+        results = results[results["date"] >= start_date]
+    if end_date:
+        results = results[results["date"] <= end_date]
+
+    total = len(results)
+    sort_cols = ["rank", "date"] if "date" in results.columns else ["rank"]
+    results = results.sort_values(sort_cols, ascending=False)
+    results = results.iloc[(page - 1) * page_size:page * page_size]
+    results["snippet"] = index["documents"].loc[results.index].str.slice(0, 200)
+    return results.reset_index(drop=True), total
+
+# --- Bulk Import Functions ---
+
+# Columns accepted by bulk_insert, in table order.
+# media_path is left out: media must come through store_upload, never from a path typed into a CSV.
+IMPORT_COLUMNS = {
+    "progress": ["date", "child_name", "discipline", "goal_area", "status", "notes"],
+    "session_plans": ["date", "lead_staff", "support_staff", "warm_up", "learning_block", "regulation_break",
+                      "social_play", "closing_routine", "materials_needed", "internal_notes"],
+}
+
+def get_import_checkpoint(file_hash, table_name):
+    """Number of CSV rows already processed for this file, so an interrupted import can resume."""
+    try:
+        df = conn.query("SELECT rows_done FROM import_jobs WHERE site_id = :site AND file_hash = :h AND table_name = :t",
+                        params={"site": current_site(), "h": file_hash, "t": table_name}, ttl=0)
+        return int(df["rows_done"].iloc[0]) if not df.empty else 0
+    except Exception:
+        return 0
+
+def bulk_insert(table_name, df, file_hash, rows_done):
+    """Inserts a validated chunk and moves the import checkpoint in the same transaction."""
+    if table_name not in IMPORT_COLUMNS: return False
+    site_id = current_site()
+    df = df[IMPORT_COLUMNS[table_name]].assign(site_id=site_id)
+    try:
+        with conn.session as s:
+            if df.empty:
+                pass
+            elif is_postgres():
+                # COPY is much faster than INSERT for large batches
+                buffer = io.StringIO()
+                df.to_csv(buffer, index=False, header=False)
+                buffer.seek(0)
+                cursor = s.connection().connection.cursor()
+                cursor.copy_expert(f"COPY {table_name} ({', '.join(df.columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+            else:
+                columns = ", ".join(df.columns)
+                values = ", ".join(f":{c}" for c in df.columns)
+                records = df.astype(object).where(df.notna(), None).to_dict("records")
+                s.execute(text(f"INSERT INTO {table_name} ({columns}) VALUES ({values})"), records)
+            s.execute(
+                text("INSERT INTO import_jobs (site_id, file_hash, table_name, rows_done, updated_at) "
+                     "VALUES (:site, :h, :t, :r, :u) "
+                     "ON CONFLICT (site_id, file_hash, table_name) DO UPDATE SET rows_done = :r, updated_at = :u"),
+                {"site": site_id, "h": file_hash, "t": table_name, "r": rows_done, "u": datetime.now()}
+            )
+            s.commit()
+        _invalidate(table_name)
+        return True
+    except Exception as e:
+        st.error(f"Error importing rows: {e}")
+        return False
+
+# --- Report Functions ---
+# These run in background report threads, so they use the engine directly (no st.* calls),
+# take the site explicitly and let errors propagate to the caller.
+
+def _period_filters(site_id, start, end, child, discipline):
+    filters = ["site_id = :site", "date >= :start", "date <= :end"]
+    params = {"site": site_id, "start": start.isoformat(), "end": end.isoformat()}
+    if child:
+        filters.append("child_name = :c")
+        params["c"] = child
+    if discipline:
+        filters.append("discipline = :di")
+        params["di"] = discipline
+    return " AND ".join(filters), params
+
+def get_progress_for_period(site_id, start, end, child=None, discipline=None):
+    """A site's progress entries between two dates (inclusive), optionally for one child or discipline."""
+    where, params = _period_filters(site_id, start, end, child, discipline)
+    with conn.engine.connect() as c:
+        df = pd.read_sql(text(f"SELECT * FROM progress WHERE {where} ORDER BY date"), c, params=params)
+    return apply_schema(df, "progress")
+
+def progress_version(df):
+    """Fingerprint of a progress frame's contents; changes whenever any field of any entry changes."""
+    # Hash each row, then the sorted row hashes, so row order doesn't matter
+    row_hashes = pd.util.hash_pandas_object(df.astype(str), index=False).sort_values()
+    digest = hashlib.sha256(",".join(df.columns).encode())
+    digest.update(row_hashes.to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+def get_progress_version(site_id, start, end, child=None, discipline=None):
+    """Content fingerprint of the matching progress entries (see progress_version)."""
+    return progress_version(get_progress_for_period(site_id, start, end, child, discipline))
+
+def get_site_ids():
+    """All site ids, for background jobs that run outside any user session."""
+    with conn.engine.connect() as c:
+        return [row[0] for row in c.execute(text("SELECT site_id FROM sites"))]
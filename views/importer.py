@@ -0,0 +1,206 @@
+# views/importer.py (NEW FILE - Bulk CSV import for historical records)
+import streamlit as st
+import hashlib
+import re
+from collections import Counter
+import pandas as pd
+from .database import get_data_between, get_list_data, get_import_checkpoint, bulk_insert, IMPORT_COLUMNS, STATUS_LEVELS
+
+CHUNK_SIZE = 5000
+
+# The date format is chosen once for the whole file; letting pandas guess per chunk can swap day and month
+DATE_FORMATS = {
+    "YYYY-MM-DD": "%Y-%m-%d",
+    "DD/MM/YYYY": "%d/%m/%Y",
+    "MM/DD/YYYY": "%m/%d/%Y",
+}
+
+# Columns compared when "skip rows matching existing entries" is turned on
+NATURAL_KEYS = {
+    "progress": ["date", "child_name", "discipline", "goal_area", "status", "notes"],
+    "session_plans": ["date", "lead_staff", "support_staff", "warm_up", "learning_block", "regulation_break",
+                      "social_play", "closing_routine", "materials_needed", "internal_notes"],
+}
+
+# Header spellings seen in exported sheets (e.g. "Daily Session Plan.csv"), after normalizing
+COLUMN_ALIASES = {
+    "child": "child_name",
+    "goal": "goal_area",
+    "performance_status": "status",
+    "anecdotal_notes": "notes",
+    "date_of_session": "date",
+    "session_lead": "lead_staff",
+    "lead": "lead_staff",
+    "warm_up_activity": "warm_up",
+    "small_group_social_play": "social_play",
+    "internal_notes_for_staff": "internal_notes",
+}
+
+REQUIRED_COLUMNS = {
+    "progress": ["date", "child_name", "discipline", "goal_area", "status"],
+    "session_plans": ["date"],
+}
+
+def normalize_header(name):
+    # "Learning Block (Main Activity)" -> "learning_block"
+    name = re.sub(r"\(.*?\)", "", str(name)).strip().lower()
+    name = re.sub(r"[^a-z0-9]+", "_", name).strip("_")
+    return COLUMN_ALIASES.get(name, name)
+
+def file_hash(uploaded_file):
+    digest = hashlib.sha256()
+    uploaded_file.seek(0)
+    for chunk in iter(lambda: uploaded_file.read(1024 * 1024), b""):
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+def row_keys(df, table_name):
+    """Hash of each row's natural key. Works for CSV chunks and rows loaded from the database alike."""
+    keys = df.reindex(columns=NATURAL_KEYS[table_name]).astype(object)
+    keys["date"] = pd.to_datetime(keys["date"], errors="coerce").dt.strftime("%Y-%m-%d")
+    keys = keys.fillna("").astype(str).apply(lambda col: col.str.strip())
+    return pd.util.hash_pandas_object(keys, index=False)
+
+def validate_chunk(chunk, table_name, lookups, first_row):
+    """Validates a whole chunk at once. Returns (valid rows, errors) where errors has one line per failed check."""
+    checks = [(chunk["date"].isna(), "Invalid or missing date")]
+    if table_name == "progress":
+        checks.append((~chunk["status"].isin(STATUS_LEVELS), f"Status must be one of {', '.join(STATUS_LEVELS)}"))
+        for col, label in [("child_name", "child"), ("discipline", "discipline"), ("goal_area", "goal area")]:
+            # Skip lists that haven't been set up yet, like the tracker does
+            if lookups[col]:
+                checks.append((~chunk[col].isin(lookups[col]), f"Unknown {label}"))
+
+    row_numbers = pd.Series(range(first_row, first_row + len(chunk)), index=chunk.index)
+    invalid = pd.Series(False, index=chunk.index)
+    errors = []
+    for mask, message in checks:
+        if mask.any():
+            invalid |= mask
+            errors.append(pd.DataFrame({"row": row_numbers[mask], "error": message}))
+    errors = pd.concat(errors) if errors else pd.DataFrame(columns=["row", "error"])
+    return chunk[~invalid], errors
+
+def skip_existing_rows(valid, table_name, inserted_keys):
+    """Marks rows that match entries already in the database, looking only at the chunk's date range.
+    Identical rows are matched one-for-one, so entries that legitimately repeat (and rows this
+    import inserted itself, in inserted_keys) are never dropped."""
+    keys = row_keys(valid, table_name)
+    existing = get_data_between(table_name, valid["date"].min(), valid["date"].max())
+    available = Counter(row_keys(existing, table_name)) - inserted_keys
+    occurrence = keys.groupby(keys).cumcount()
+    return occurrence < keys.map(available)
+
+def import_csv(uploaded_file, table_name, date_format=DATE_FORMATS["YYYY-MM-DD"], skip_existing=False,
+               on_progress=None):
+    """Streams a CSV into the table in chunks, one transaction per chunk.
+    Resumes after the last committed chunk if the same file was imported before.
+    With skip_existing, rows matching entries already in the database are not inserted again
+    (e.g. when a corrected error file is uploaded)."""
+    result = {"inserted": 0, "resumed_from": 0, "errors": pd.DataFrame(columns=["row", "error"]), "completed": False}
+    key = file_hash(uploaded_file)
+    rows_done = get_import_checkpoint(key, table_name)
+    result["resumed_from"] = rows_done
+
+    lookups = {
+        "child_name": set(get_list_data("children").get("child_name", pd.Series(dtype=str)).dropna()),
+        "discipline": set(get_list_data("disciplines").get("name", pd.Series(dtype=str)).dropna()),
+        "goal_area": set(get_list_data("goal_areas").get("name", pd.Series(dtype=str)).dropna()),
+    }
+    inserted_keys = Counter()
+
+    reader = pd.read_csv(uploaded_file, dtype=str, chunksize=CHUNK_SIZE, skipinitialspace=True,
+                         skiprows=range(1, rows_done + 1))
+    error_frames = []
+    for chunk in reader:
+        chunk = chunk.rename(columns=normalize_header)
+        repeated = sorted(set(chunk.columns[chunk.columns.duplicated()]))
+        if repeated:
+            st.error(f"CSV has more than one column for: {', '.join(repeated)}")
+            return result
+        missing = [c for c in REQUIRED_COLUMNS[table_name] if c not in chunk.columns]
+        if missing:
+            st.error(f"CSV is missing required columns: {', '.join(missing)}")
+            return result
+
+        # Keep known columns only; optional ones are filled with blanks
+        chunk = chunk.reindex(columns=IMPORT_COLUMNS[table_name]).astype(object)
+        text_cols = [c for c in chunk.columns if c != "date"]
+        chunk[text_cols] = chunk[text_cols].apply(lambda col: col.str.strip())
+        chunk["date"] = pd.to_datetime(chunk["date"], format=date_format, errors="coerce").dt.date
+        if table_name == "progress":
+            chunk["status"] = chunk["status"].str.title()
+
+        # CSV line numbers: header is line 1
+        valid, errors = validate_chunk(chunk, table_name, lookups, first_row=rows_done + 2)
+        valid = valid.assign(date=valid["date"].map(lambda d: d.isoformat()))
+
+        if skip_existing and not valid.empty:
+            try:
+                duplicate = skip_existing_rows(valid, table_name, inserted_keys)
+            except Exception as e:
+                st.error(f"Error checking for existing entries: {e}")
+                break
+            if duplicate.any():
+                line_numbers = pd.Series(valid.index - chunk.index[0] + rows_done + 2, index=valid.index)
+                errors = pd.concat([errors, pd.DataFrame({"row": line_numbers[duplicate], "error": "Already imported"})])
+                valid = valid[~duplicate]
+        if not bulk_insert(table_name, valid, key, rows_done + len(chunk)):
+            break
+        rows_done += len(chunk)
+        if skip_existing:
+            inserted_keys.update(row_keys(valid, table_name))
+        result["inserted"] += len(valid)
+        error_frames.append(errors)
+        if on_progress:
+            on_progress(rows_done)
+    else:
+        result["completed"] = True
+
+    if error_frames:
+        result["errors"] = pd.concat(error_frames).sort_values("row").reset_index(drop=True)
+    return result
+
+def show_import_tools():
+    st.header("Import Historical Records")
+    st.info("Upload a CSV of past progress entries or session plans. Column headers can use the same labels as the forms "
+            "(e.g. 'Date of Session', 'Warm-Up Activity'). Rows that fail validation are skipped and listed below.")
+
+    source = st.radio("Import into", ["Progress Entries", "Session Plans"], horizontal=True)
+    table_name = "progress" if source == "Progress Entries" else "session_plans"
+    st.caption(f"Expected columns: {', '.join(IMPORT_COLUMNS[table_name])}")
+
+    date_label = st.selectbox("Date Format in File", list(DATE_FORMATS),
+                              help="Used for every row. Rows with dates in another format are rejected.")
+    skip_existing = st.checkbox("Skip rows that match existing entries",
+                                help="Use when re-uploading a corrected error report. Each row is matched against "
+                                     "at most one existing entry with the same date and contents.")
+    uploaded = st.file_uploader("CSV File", type=["csv"], key=f"import_{table_name}")
+    if uploaded is None:
+        return
+
+    rows_done = get_import_checkpoint(file_hash(uploaded), table_name)
+    if rows_done:
+        st.info(f"{rows_done} rows of this file were already processed. The import will resume after them.")
+
+    if st.button("📥 Start Import"):
+        status = st.empty()
+        result = import_csv(uploaded, table_name, date_format=DATE_FORMATS[date_label], skip_existing=skip_existing,
+                            on_progress=lambda done: status.caption(f"Processed {done} rows..."))
+
+        if result["completed"]:
+            st.success(f"Imported {result['inserted']} rows into {source}.")
+        else:
+            st.warning(f"Import stopped after {result['inserted']} rows. Upload the same file again to resume.")
+
+        errors = result["errors"]
+        if not errors.empty:
+            st.error(f"{errors['row'].nunique()} rows were skipped.")
+            st.dataframe(errors, use_container_width=True)
+            st.download_button(
+                label="📥 Download Error Report",
+                data=errors.to_csv(index=False).encode('utf-8'),
+                file_name=f"TILP_Import_Errors_{table_name}.csv",
+                mime='text/csv',
+            )
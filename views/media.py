@@ -0,0 +1,80 @@
+# views/media.py (NEW FILE - Media attachments with thumbnail cache)
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from PIL import Image
+
+# Uploads are stored by content hash, so the same photo uploaded twice is kept once
+MEDIA_DIR = Path(os.environ.get("TILP_MEDIA_DIR", "media"))
+THUMB_DIR = MEDIA_DIR / "thumbs"
+
+CHUNK_SIZE = 1024 * 1024  # 1 MB
+THUMB_SIZE = (320, 320)
+
+IMAGE_TYPES = ["jpg", "jpeg", "png", "gif", "webp"]
+VIDEO_TYPES = ["mp4", "mov", "webm"]
+
+def store_upload(uploaded_file):
+    """Streams an uploaded file to content-addressed storage in chunks.
+    Returns the media path to save with the progress entry."""
+    MEDIA_DIR.mkdir(parents=True, exist_ok=True)
+    extension = Path(uploaded_file.name).suffix.lower()
+    digest = hashlib.sha256()
+
+    uploaded_file.seek(0)
+    with tempfile.NamedTemporaryFile(dir=MEDIA_DIR, delete=False) as tmp:
+        for chunk in iter(lambda: uploaded_file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+            tmp.write(chunk)
+
+    file_hash = digest.hexdigest()
+    target = MEDIA_DIR / file_hash[:2] / f"{file_hash}{extension}"
+    if target.exists():
+        # Duplicate upload, keep the existing copy
+        os.remove(tmp.name)
+    else:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp.name, target)
+
+    media_path = target.relative_to(MEDIA_DIR).as_posix()
+    # Build the thumbnail now so the dashboard never has to decode the full file
+    get_thumbnail(media_path)
+    return media_path
+
+def media_file(media_path):
+    """Full path of a stored media file, or None if it is missing or points outside MEDIA_DIR."""
+    if not media_path:
+        return None
+    path = (MEDIA_DIR / media_path).resolve()
+    if not path.is_relative_to(MEDIA_DIR.resolve()):
+        return None
+    return path if path.is_file() else None
+
+def is_video(media_path):
+    return Path(media_path).suffix.lower().lstrip(".") in VIDEO_TYPES
+
+def get_thumbnail(media_path):
+    """Returns the path of a downscaled JPEG thumbnail, generating it once into the on-disk cache.
+    Returns None for videos and files that can't be read as images."""
+    source = media_file(media_path)
+    if source is None or is_video(media_path):
+        return None
+
+    thumb = THUMB_DIR / f"{source.stem}_{THUMB_SIZE[0]}.jpg"
+    if thumb.exists():
+        return thumb
+
+    THUMB_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = tempfile.NamedTemporaryFile(dir=THUMB_DIR, suffix=".jpg", delete=False)
+    try:
+        with tmp, Image.open(source) as img:
+            # draft() lets JPEG decode straight at a reduced scale instead of full resolution
+            img.draft("RGB", THUMB_SIZE)
+            img.thumbnail(THUMB_SIZE)
+            img.convert("RGB").save(tmp, "JPEG", quality=80)
+        os.replace(tmp.name, thumb)
+        return thumb
+    except Exception:
+        os.remove(tmp.name)
+        return None
@@ -0,0 +1,226 @@
+# views/migrations.py (NEW FILE - Versioned schema migrations)
+# Only depends on SQLAlchemy so it can run against Postgres or a local SQLite engine.
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import text, inspect
+
+# Free-text columns that are searchable in each table
+SEARCH_FIELDS = {
+    "progress": ["notes"],
+    "session_plans": ["warm_up", "learning_block", "regulation_break", "social_play",
+                      "closing_routine", "materials_needed", "internal_notes"],
+}
+
+# Indexes the app relies on, as table -> list of leading column lists
+REQUIRED_INDEXES = {
+    "users": [["username"]],
+    "children": [["site_id", "child_name"]],
+    "disciplines": [["site_id", "name"]],
+    "goal_areas": [["site_id", "name"]],
+    "progress": [["site_id", "child_name", "date"]],
+    "session_plans": [["site_id", "date"]],
+}
+
+# Rows created before sites existed belong to this site
+DEFAULT_SITE = "default"
+
+# Every table holding site data; users are global logins that belong to one site
+SITE_TABLES = ["users", "children", "disciplines", "goal_areas", "progress", "session_plans", "import_jobs"]
+
+# Any fixed number works, it just has to be the same for every app process
+MIGRATION_LOCK_ID = 7311
+
+def tsvector_expr(table_name):
+    # Must match the GIN index expression exactly, otherwise Postgres won't use the index
+    fields = " || ' ' || ".join(f"coalesce({f}, '')" for f in SEARCH_FIELDS[table_name])
+    return f"to_tsvector('english', {fields})"
+
+def _index_covers(connection, table_name, columns):
+    """True if a primary key, unique constraint or index on the table starts with these columns."""
+    insp = inspect(connection)
+    candidates = [insp.get_pk_constraint(table_name).get("constrained_columns") or []]
+    candidates += [u["column_names"] for u in insp.get_unique_constraints(table_name)]
+    candidates += [i["column_names"] for i in insp.get_indexes(table_name)]
+    return any(list(c[:len(columns)]) == columns for c in candidates)
+
+# --- Migrations ---
+# Each migration is a function (connection, dialect) and runs in its own transaction.
+# Never edit a migration once it has shipped; add a new one instead.
+
+def _m001_base_tables(c, dialect):
+    # IF NOT EXISTS keeps the tables that were created by hand in Supabase
+    serial = "SERIAL PRIMARY KEY" if dialect == "postgresql" else "INTEGER PRIMARY KEY AUTOINCREMENT"
+    c.execute(text("CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY, password TEXT, "
+                   "role TEXT, child_link TEXT DEFAULT 'All')"))
+    c.execute(text("CREATE TABLE IF NOT EXISTS children (child_name TEXT PRIMARY KEY, "
+                   "parent_username TEXT DEFAULT 'None', date_of_birth DATE)"))
+    c.execute(text("CREATE TABLE IF NOT EXISTS disciplines (name TEXT PRIMARY KEY)"))
+    c.execute(text("CREATE TABLE IF NOT EXISTS goal_areas (name TEXT PRIMARY KEY)"))
+    c.execute(text(f"CREATE TABLE IF NOT EXISTS progress (id {serial}, date DATE, child_name TEXT, "
+                   "discipline TEXT, goal_area TEXT, status TEXT, notes TEXT, media_path TEXT)"))
+    c.execute(text(f"CREATE TABLE IF NOT EXISTS session_plans (id {serial}, date DATE, lead_staff TEXT, "
+                   "support_staff TEXT, warm_up TEXT, learning_block TEXT, regulation_break TEXT, "
+                   "social_play TEXT, closing_routine TEXT, materials_needed TEXT, internal_notes TEXT)"))
+
+def _m002_performance_indexes(c, dialect):
+    # Hand-made tables may already have a key that serves the same purpose
+    if not _index_covers(c, "users", ["username"]):
+        c.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS idx_users_username ON users (username)"))
+    if not _index_covers(c, "children", ["child_name"]):
+        c.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS idx_children_child_name ON children (child_name)"))
+    c.execute(text("CREATE INDEX IF NOT EXISTS idx_progress_child_date ON progress (child_name, date)"))
+    c.execute(text("CREATE INDEX IF NOT EXISTS idx_session_plans_date ON session_plans (date)"))
+
+def _m003_search_indexes(c, dialect):
+    # SQLite uses the in-process search index instead
+    if dialect != "postgresql":
+        return
+    for table_name in SEARCH_FIELDS:
+        c.execute(text(f"CREATE INDEX IF NOT EXISTS idx_{table_name}_fts "
+                       f"ON {table_name} USING GIN ({tsvector_expr(table_name)})"))
+
+def _m004_import_jobs(c, dialect):
+    # Checkpoints for resumable CSV imports, keyed by the file's content hash
+    c.execute(text("CREATE TABLE IF NOT EXISTS import_jobs (file_hash TEXT, table_name TEXT, "
+                   "rows_done INTEGER DEFAULT 0, updated_at TIMESTAMP, PRIMARY KEY (file_hash, table_name))"))
+
+def _scope_key_to_site(c, dialect, table_name, key_columns, create_sql):
+    """Replaces a table's unique key on key_columns with one on (site_id, *key_columns)."""
+    if dialect == "sqlite":
+        # SQLite can't drop a primary key, so rebuild the table and copy the rows across
+        columns = ", ".join(col["name"] for col in inspect(c).get_columns(table_name))
+        c.execute(text(f"ALTER TABLE {table_name} RENAME TO {table_name}_old"))
+        c.execute(text(create_sql))
+        c.execute(text(f"INSERT INTO {table_name} ({columns}) SELECT {columns} FROM {table_name}_old"))
+        c.execute(text(f"DROP TABLE {table_name}_old"))
+        return
+
+    insp = inspect(c)
+    pk = insp.get_pk_constraint(table_name)
+    if pk.get("constrained_columns") == key_columns:
+        c.execute(text(f'ALTER TABLE {table_name} DROP CONSTRAINT "{pk["name"]}"'))
+    for unique in insp.get_unique_constraints(table_name):
+        if unique["column_names"] == key_columns:
+            c.execute(text(f'ALTER TABLE {table_name} DROP CONSTRAINT "{unique["name"]}"'))
+    for index in insp.get_indexes(table_name):
+        if index["unique"] and index["column_names"] == key_columns and not index.get("duplicates_constraint"):
+            c.execute(text(f'DROP INDEX IF EXISTS "{index["name"]}"'))
+    key = "_".join(key_columns)
+    c.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table_name}_site_{key} "
+                   f"ON {table_name} (site_id, {', '.join(key_columns)})"))
+
+def _restore_interrupted_rebuild(c, table_name):
+    # A leftover <table>_old (from a run before migrations were transactional) still holds
+    # the original rows, so put it back and let the rebuild start over
+    if inspect(c).has_table(f"{table_name}_old"):
+        c.execute(text(f"DROP TABLE IF EXISTS {table_name}"))
+        c.execute(text(f"ALTER TABLE {table_name}_old RENAME TO {table_name}"))
+
+def _m005_site_partitioning(c, dialect):
+    if dialect == "sqlite":
+        for table_name in ["children", "disciplines", "goal_areas", "import_jobs"]:
+            _restore_interrupted_rebuild(c, table_name)
+    c.execute(text("CREATE TABLE IF NOT EXISTS sites (site_id TEXT PRIMARY KEY, site_name TEXT)"))
+    c.execute(text("INSERT INTO sites (site_id, site_name) VALUES (:s, 'Main Site') ON CONFLICT (site_id) DO NOTHING"),
+              {"s": DEFAULT_SITE})
+
+    insp = inspect(c)
+    for table_name in SITE_TABLES:
+        if "site_id" not in [col["name"] for col in insp.get_columns(table_name)]:
+            c.execute(text(f"ALTER TABLE {table_name} ADD COLUMN site_id TEXT NOT NULL DEFAULT '{DEFAULT_SITE}'"))
+
+    # Names only have to be unique within a site
+    _scope_key_to_site(c, dialect, "children", ["child_name"],
+                       "CREATE TABLE children (child_name TEXT, parent_username TEXT DEFAULT 'None', date_of_birth DATE, "
+                       f"site_id TEXT NOT NULL DEFAULT '{DEFAULT_SITE}', PRIMARY KEY (site_id, child_name))")
+    for table_name in ["disciplines", "goal_areas"]:
+        _scope_key_to_site(c, dialect, table_name, ["name"],
+                           f"CREATE TABLE {table_name} (name TEXT, "
+                           f"site_id TEXT NOT NULL DEFAULT '{DEFAULT_SITE}', PRIMARY KEY (site_id, name))")
+    _scope_key_to_site(c, dialect, "import_jobs", ["file_hash", "table_name"],
+                       "CREATE TABLE import_jobs (file_hash TEXT, table_name TEXT, rows_done INTEGER DEFAULT 0, "
+                       f"updated_at TIMESTAMP, site_id TEXT NOT NULL DEFAULT '{DEFAULT_SITE}', "
+                       "PRIMARY KEY (site_id, file_hash, table_name))")
+
+    # Site goes first so each site's queries only touch its own slice of the index
+    c.execute(text("DROP INDEX IF EXISTS idx_progress_child_date"))
+    c.execute(text("DROP INDEX IF EXISTS idx_session_plans_date"))
+    c.execute(text("CREATE INDEX IF NOT EXISTS idx_progress_site_child_date ON progress (site_id, child_name, date)"))
+    c.execute(text("CREATE INDEX IF NOT EXISTS idx_progress_site_date ON progress (site_id, date)"))
+    c.execute(text("CREATE INDEX IF NOT EXISTS idx_session_plans_site_date ON session_plans (site_id, date)"))
+
+def _m006_user_sites(c, dialect):
+    # Extra sites a user may switch to; everyone can always work in their own users.site_id
+    c.execute(text("CREATE TABLE IF NOT EXISTS user_sites (username TEXT, site_id TEXT, PRIMARY KEY (username, site_id))"))
+
+MIGRATIONS = [
+    (1, "base tables", _m001_base_tables),
+    (2, "performance indexes", _m002_performance_indexes),
+    (3, "full-text search indexes", _m003_search_indexes),
+    (4, "import checkpoints", _m004_import_jobs),
+    (5, "site partitioning", _m005_site_partitioning),
+    (6, "user site access", _m006_user_sites),
+]
+
+# --- Runner ---
+
+@contextmanager
+def _transaction(engine):
+    """One real transaction, DDL included.
+    pysqlite only opens a transaction before DML, so CREATE/ALTER would commit straight away.
+    On SQLite we take over BEGIN ourselves, as in SQLAlchemy's pysqlite recipe."""
+    with engine.connect() as c:
+        if engine.dialect.name != "sqlite":
+            with c.begin():
+                yield c
+            return
+        dbapi_connection = c.connection.driver_connection
+        previous = dbapi_connection.isolation_level
+        dbapi_connection.isolation_level = None
+        try:
+            with c.begin():
+                c.exec_driver_sql("BEGIN")
+                yield c
+        finally:
+            dbapi_connection.isolation_level = previous
+
+def applied_versions(engine):
+    with engine.connect() as c:
+        return {row[0] for row in c.execute(text("SELECT version FROM schema_migrations"))}
+
+def run_migrations(engine):
+    """Applies any migrations not yet recorded in schema_migrations. Returns the versions applied."""
+    dialect = engine.dialect.name
+    with _transaction(engine) as c:
+        c.execute(text("CREATE TABLE IF NOT EXISTS schema_migrations "
+                       "(version INTEGER PRIMARY KEY, description TEXT, applied_at TIMESTAMP)"))
+
+    applied = []
+    done = applied_versions(engine)
+    for version, description, migrate in MIGRATIONS:
+        if version in done:
+            continue
+        with _transaction(engine) as c:
+            if dialect == "postgresql":
+                # Serialize app processes starting at the same time, then re-check under the lock
+                c.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": MIGRATION_LOCK_ID})
+                if c.execute(text("SELECT 1 FROM schema_migrations WHERE version = :v"), {"v": version}).first():
+                    continue
+            migrate(c, dialect)
+            c.execute(text("INSERT INTO schema_migrations (version, description, applied_at) VALUES (:v, :d, :t)"),
+                      {"v": version, "d": description, "t": datetime.now()})
+        applied.append(version)
+    return applied
+
+def verify_indexes(engine):
+    """Returns the required indexes that are missing, e.g. ["progress(child_name, date)"]."""
+    missing = []
+    with engine.connect() as c:
+        for table_name, index_list in REQUIRED_INDEXES.items():
+            for columns in index_list:
+                if not _index_covers(c, table_name, columns):
+                    missing.append(f"{table_name}({', '.join(columns)})")
+        if engine.dialect.name == "postgresql":
+            names = {i["name"] for t in SEARCH_FIELDS for i in inspect(c).get_indexes(t)}
+            missing += [f"idx_{t}_fts" for t in SEARCH_FIELDS if f"idx_{t}_fts" not in names]
+    return missing
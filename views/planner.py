@@ -2,7 +2,7 @@
 import streamlit as st
 from datetime import date
 # Using relative import (dot) since database.py is in the same folder
-from .database import save_plan, get_data 
+from .database import save_plan, load_frame 
 import pandas as pd
 
 def show_page():
@@ -80,14 +80,12 @@ def show_page():
     st.subheader("🗓️ All Daily Plans")
     
     try:
-        df_plans = get_data("session_plans")
+        # Dates already come back as datetime64 from load_frame
+        df_plans = load_frame("session_plans")
         
         if df_plans.empty:
             st.warning("No session plans saved yet.")
             return
-
-        # Convert date column to datetime objects for filtering
-        df_plans['date'] = pd.to_datetime(df_plans['date'])
         
         # --- NEW DATE RANGE FILTER ---
         with st.expander("🔎 Filter Daily Plans by Date Range", expanded=True):
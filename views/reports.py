@@ -0,0 +1,240 @@
+# views/reports.py (NEW FILE - Background report generation with cached results)
+import streamlit as st
+import hashlib
+import html
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+import pandas as pd
+import plotly.express as px
+import kaleido
+from choreographer.browsers.chromium import Chromium
+from .database import (get_progress_for_period, get_progress_version, progress_version, get_site_ids,
+                       current_site, STATUS_LEVELS)
+
+# Reports are stored as REPORT_DIR/<subject hash>/<period>/<data version>/,
+# where the subject hash covers the raw site id, scope and name
+REPORT_DIR = Path(os.environ.get("TILP_REPORT_DIR", "reports"))
+REPORT_WORKERS = 2
+SCHEDULE_CHECK_SECONDS = 3600
+
+STATUS_COLORS = {"Regression": "#e45756", "Stable": "#f2cf5b", "Progress": "#54a24b"}
+
+logger = logging.getLogger(__name__)
+
+# Shared by all sessions and the scheduler thread; report builds never run inside the Streamlit script.
+# A plain module-level pool, since st.cache_resource isn't available outside a script run.
+_executor = ThreadPoolExecutor(max_workers=REPORT_WORKERS, thread_name_prefix="tilp-report")
+
+# In-flight jobs, so the same report is never built twice at once
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+def month_bounds(period):
+    """First and last day of a "YYYY-MM" period."""
+    start = date.fromisoformat(f"{period}-01")
+    end = (start.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    return start, end
+
+def recent_periods(count=12):
+    first = date.today().replace(day=1)
+    periods = []
+    for _ in range(count):
+        periods.append(first.strftime("%Y-%m"))
+        first = (first - timedelta(days=1)).replace(day=1)
+    return periods
+
+def _filters(scope, name):
+    return {"child": name} if scope == "child" else {"discipline": name}
+
+def _report_dir(site_id, scope, name, period, version):
+    # Hash the raw values rather than slugging them, so "Jo-Ann" and "Jo Ann" never share a folder
+    subject = hashlib.sha256(json.dumps([site_id, scope, name]).encode()).hexdigest()[:16]
+    return REPORT_DIR / subject / period / version
+
+def cached_report(site_id, scope, name, period):
+    """Folder of the report for the current data, or None if it hasn't been built yet."""
+    start, end = month_bounds(period)
+    version = get_progress_version(site_id, start, end, **_filters(scope, name))
+    folder = _report_dir(site_id, scope, name, period, version)
+    return folder if (folder / "report.html").exists() else None
+
+def build_report(site_id, scope, name, period):
+    """Builds the HTML report plus PNG/PDF charts and returns its folder.
+    Raises if the charts can't be exported, so no incomplete report is ever published."""
+    start, end = month_bounds(period)
+    df = get_progress_for_period(site_id, start, end, **_filters(scope, name))
+    # Versioned by the rows actually read, so the folder always matches its contents
+    folder = _report_dir(site_id, scope, name, period, progress_version(df))
+    if (folder / "report.html").exists():
+        return folder
+
+    # Children are broken down by goal area, disciplines by child
+    group_col = "goal_area" if scope == "child" else "child_name"
+    title = html.escape(f"{name} — {start.strftime('%B %Y')}")
+
+    if df.empty:
+        summary = pd.DataFrame()
+        figures = []
+    else:
+        summary = pd.crosstab(df[group_col], df["status"]).reindex(columns=STATUS_LEVELS, fill_value=0)
+        summary["Entries"] = summary.sum(axis=1)
+        figures = [
+            px.histogram(df, x="date", color="status", color_discrete_map=STATUS_COLORS,
+                         title="Performance Status Over Time"),
+            px.histogram(df, x=group_col, color="status", color_discrete_map=STATUS_COLORS,
+                         barmode="group", title=f"Status by {group_col.replace('_', ' ').title()}"),
+        ]
+
+    parts = [f"<html><head><meta charset='utf-8'><title>{title}</title></head><body>",
+             f"<h1>TILP Connect Progress Report</h1><h2>{title}</h2>"]
+    if df.empty:
+        parts.append("<p>No progress entries in this period.</p>")
+    else:
+        parts.append(f"<p>{len(df)} entries.</p>")
+        parts.append(summary.to_html())
+        for i, fig in enumerate(figures):
+            parts.append(fig.to_html(full_html=False, include_plotlyjs="cdn" if i == 0 else False))
+        entries = df.drop(columns=["id", "media_path"], errors="ignore").assign(date=df["date"].dt.date)
+        parts.append(entries.to_html(index=False))
+    parts.append("</body></html>")
+
+    # Build in a temp folder and move it into place, so readers never see a half-written report
+    folder.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(dir=folder.parent))
+    try:
+        (tmp / "report.html").write_text("\n".join(parts), encoding="utf-8")
+        for i, fig in enumerate(figures, start=1):
+            try:
+                fig.write_image(tmp / f"chart_{i}.png")
+                fig.write_image(tmp / f"chart_{i}.pdf")
+            except Exception as e:
+                # Nothing is published, so the next request or scheduler run rebuilds it
+                raise RuntimeError(f"Chart export failed (is Chrome available to kaleido?): {e}") from e
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    try:
+        os.replace(tmp, folder)
+    except OSError:
+        # Another worker finished the same report first
+        shutil.rmtree(tmp, ignore_errors=True)
+    return folder
+
+def request_report(site_id, scope, name, period):
+    """Queues a report build in the background pool. Returns the Future for the job."""
+    key = (site_id, scope, name, period)
+    with _jobs_lock:
+        job = _jobs.get(key)
+        if job is None or job.done():
+            job = _jobs[key] = _executor.submit(build_report, *key)
+        return job
+
+def report_pending(site_id, scope, name, period):
+    job = _jobs.get((site_id, scope, name, period))
+    return job is not None and not job.done()
+
+def report_error(site_id, scope, name, period):
+    """The exception from the last failed build of a report, if any."""
+    job = _jobs.get((site_id, scope, name, period))
+    return job.exception() if job is not None and job.done() else None
+
+def run_period_reports(site_id, period):
+    """Queues child and discipline reports for everyone at the site with entries in the period."""
+    start, end = month_bounds(period)
+    df = get_progress_for_period(site_id, start, end)
+    jobs = [request_report(site_id, "child", c, period) for c in df["child_name"].dropna().unique()]
+    jobs += [request_report(site_id, "discipline", d, period) for d in df["discipline"].dropna().unique()]
+    return jobs
+
+def ensure_chrome():
+    """Kaleido 1.x exports charts through a headless Chrome. Downloads one into kaleido's
+    local cache unless the server already has Chrome/Chromium installed or cached."""
+    try:
+        if Chromium.find_browser(skip_local=False) is None:
+            kaleido.get_chrome_sync()
+    except Exception:
+        logger.exception("Could not provision Chrome for chart export; reports will fail until it is installed")
+
+def _scheduler_loop():
+    ensure_chrome()
+    while True:
+        # Month-end reporting: make sure last month's reports exist (no-op once they are cached)
+        last_month = (date.today().replace(day=1) - timedelta(days=1)).strftime("%Y-%m")
+        try:
+            site_ids = get_site_ids()
+        except Exception:
+            logger.exception("Scheduled reports: could not list sites")
+            site_ids = []
+        # One failing site or report must not stop the rest of the caseload
+        for site_id in site_ids:
+            try:
+                jobs = run_period_reports(site_id, last_month)
+            except Exception:
+                logger.exception("Scheduled reports failed for site %s", site_id)
+                continue
+            for job in jobs:
+                try:
+                    job.result()
+                except Exception:
+                    logger.exception("Scheduled report failed for site %s", site_id)
+        time.sleep(SCHEDULE_CHECK_SECONDS)
+
+@st.cache_resource
+def start_scheduler():
+    """Starts the month-end report thread once per server process."""
+    thread = threading.Thread(target=_scheduler_loop, name="tilp-report-scheduler", daemon=True)
+    thread.start()
+    return thread
+
+def show_reports(scope, name):
+    """Dashboard section: serves the cached report for a child or discipline, or queues it."""
+    st.subheader(f"📄 Monthly Report — {name}")
+    period = st.selectbox("Report Month", recent_periods(), key=f"report_period_{scope}")
+    site_id = current_site()
+
+    try:
+        folder = cached_report(site_id, scope, name, period)
+    except Exception as e:
+        st.warning(f"Error loading report: {e}")
+        return
+
+    if folder is None:
+        if report_pending(site_id, scope, name, period):
+            st.info("Report is being generated in the background.")
+            st.button("🔄 Refresh", key=f"report_refresh_{scope}")
+            return
+        error = report_error(site_id, scope, name, period)
+        if error is not None:
+            st.error(f"Report generation failed: {error}")
+        if st.button("⚙️ Generate Report", key=f"report_generate_{scope}"):
+            request_report(site_id, scope, name, period)
+            st.rerun()
+        return
+
+    file_stem = f"TILP_Report_{re.sub(r'[^A-Za-z0-9]+', '_', name)}_{period}"
+    st.download_button(
+        label="📥 Download Report (HTML)",
+        data=(folder / "report.html").read_bytes(),
+        file_name=f"{file_stem}.html",
+        mime="text/html",
+        key=f"report_html_{scope}",
+    )
+    charts = sorted(folder.glob("chart_*.png")) + sorted(folder.glob("chart_*.pdf"))
+    for chart in charts:
+        file_type = chart.suffix.lstrip(".").upper()
+        st.download_button(
+            label=f"📥 Download {chart.stem.replace('_', ' ').title()} ({file_type})",
+            data=chart.read_bytes(),
+            file_name=f"{file_stem}_{chart.name}",
+            mime="image/png" if file_type == "PNG" else "application/pdf",
+            key=f"report_{chart.name}_{scope}",
+        )
@@ -0,0 +1,74 @@
+# views/search.py (NEW FILE - Full-text search over notes and plans)
+import streamlit as st
+from datetime import date
+from .database import search_records, get_list_data
+import pandas as pd
+
+PAGE_SIZE = 25
+
+def show_page():
+    st.header("🔍 Search Notes & Plans")
+    st.info("Search anecdotal progress notes and daily session plans. Results are ranked by relevance.")
+
+    # --- Fetch dynamic lists for filters ---
+    df_children = get_list_data("children")
+    children = df_children["child_name"].tolist() if "child_name" in df_children.columns else []
+    df_disciplines = get_list_data("disciplines")
+    disciplines = df_disciplines["name"].tolist() if "name" in df_disciplines.columns else []
+
+    col1, col2 = st.columns([3, 1])
+    query = col1.text_input("Search for", placeholder="e.g., spoon independently")
+    source = col2.radio("Search in", ["Progress Notes", "Session Plans"])
+    table_name = "progress" if source == "Progress Notes" else "session_plans"
+
+    with st.expander("🔎 Filters", expanded=False):
+        col_c, col_d = st.columns(2)
+        child = col_c.selectbox("Child", ["All"] + sorted(children), disabled=table_name != "progress")
+        discipline = col_d.selectbox("Discipline", ["All"] + sorted(disciplines), disabled=table_name != "progress")
+
+        col_start, col_end = st.columns(2)
+        use_dates = st.checkbox("Filter by date range")
+        start_date = col_start.date_input("Start Date", date(date.today().year, 1, 1), disabled=not use_dates)
+        end_date = col_end.date_input("End Date", date.today(), disabled=not use_dates)
+
+    if not query:
+        return
+
+    if use_dates and start_date > end_date:
+        st.error("Error: Start Date cannot be after End Date.")
+        return
+
+    page = st.session_state.get("search_page", 1)
+    # Go back to the first page whenever the search itself changes
+    search_key = (query, table_name, child, discipline, use_dates, start_date, end_date)
+    if st.session_state.get("search_key") != search_key:
+        st.session_state["search_key"] = search_key
+        page = 1
+
+    results, total = search_records(
+        table_name,
+        query,
+        child=None if child == "All" else child,
+        discipline=None if discipline == "All" else discipline,
+        start_date=start_date if use_dates else None,
+        end_date=end_date if use_dates else None,
+        page=page,
+        page_size=PAGE_SIZE,
+    )
+
+    if total == 0:
+        st.warning("No matches found.")
+        return
+
+    pages = max(1, -(-total // PAGE_SIZE))
+    st.caption(f"{total} matches — page {page} of {pages}")
+    st.dataframe(results, use_container_width=True)
+
+    col_prev, col_next = st.columns(2)
+    if col_prev.button("⬅️ Previous", disabled=page <= 1):
+        st.session_state["search_page"] = page - 1
+        st.rerun()
+    if col_next.button("Next ➡️", disabled=page >= pages):
+        st.session_state["search_page"] = page + 1
+        st.rerun()
+    st.session_state["search_page"] = page
@@ -3,13 +3,14 @@ import streamlit as st
 from datetime import date
 # Using relative import for database
 from .database import save_progress, get_list_data 
+from .media import store_upload, IMAGE_TYPES, VIDEO_TYPES
 
 def show_page():
     st.header("📝 Client Progress Tracker")
     st.info("Log daily outcomes for clients here. This feeds the Dashboard.")
 
     # --- Fetch dynamic lists for dropdowns ---
-    children = get_list_data("children")["name"].tolist()
+    children = get_list_data("children")["child_name"].tolist()
     disciplines = get_list_data("disciplines")["name"].tolist()
     
     # Add hardcoded children if none are in the DB yet (or use your master list)
@@ -34,12 +35,15 @@ def show_page():
             status = st.select_slider("Performance Status", options=["Regression", "Stable", "Progress"], value="Stable")
         
         notes = st.text_area("Anecdotal Notes", placeholder="e.g., Used spoon independently for 3 scoops...")
+        media = st.file_uploader("Photo / Video Evidence (Optional)", type=IMAGE_TYPES + VIDEO_TYPES)
         
         submitted = st.form_submit_button("💾 Save Entry")
         
         if submitted:
+            # Media is written to local storage first; only its path goes to the database
+            media_path = store_upload(media) if media is not None else None
             # save_progress now returns a boolean for success
-            if save_progress(date_input, child, discipline, goal_area, status, notes):
+            if save_progress(date_input, child, discipline, goal_area, status, notes, media_path):
                 st.success(f"Data saved for {child}!")
             else:
                 st.error("Failed to save data to Supabase.")
\ No newline at end of file